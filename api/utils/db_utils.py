@@ -72,34 +72,40 @@ def init_db():
         );
         """)
 
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS authors_user_slug_idx
+            ON authors (user_id, author_slug);
+        """)
 
-def ensure_user(user_id: str) -> int:
+
+def ensure_user(cur, user_id: str) -> int:
     """
     Ensure a user exists in the database, creating it if necessary.
 
     Args:
+        cur: Open database cursor.
         user_id (str): Unique identifier for the user.
 
     Returns:
         int: Database ID of the user.
     """
-    with get_db_cursor() as cur:
-        cur.execute("SELECT id FROM users WHERE user_id = %s", (user_id,))
-        user = cur.fetchone()
-        if user:
-            return user['id']
-        cur.execute(
-            "INSERT INTO users (user_id) VALUES (%s) RETURNING id",
-            (user_id,)
-        )
-        return cur.fetchone()['id']
-
-
-def ensure_author(user_db_id: int, author_name: str) -> int:
+    cur.execute(
+        (
+            "INSERT INTO users (user_id) VALUES (%s) "
+            "ON CONFLICT (user_id) DO UPDATE SET user_id = EXCLUDED.user_id "
+            "RETURNING id"
+        ),
+        (user_id,)
+    )
+    return cur.fetchone()['id']
+
+
+def ensure_author(cur, user_db_id: int, author_name: str) -> int:
     """
     Ensure an author exists for a given user, creating it if necessary.
 
     Args:
+        cur: Open database cursor.
         user_db_id (int): ID of the user in the database.
         author_name (str): Name of the author.
 
@@ -107,27 +113,25 @@ def ensure_author(user_db_id: int, author_name: str) -> int:
         int: Database ID of the author.
     """
     author_slug = slugify(author_name)
-    with get_db_cursor() as cur:
-        cur.execute(
-            "SELECT id FROM authors WHERE user_id = %s AND author_slug = %s",
-            (user_db_id, author_slug)
-        )
-        author = cur.fetchone()
-        if author:
-            # Optional: update author_name if changed
-            cur.execute(
-                "UPDATE authors SET author = %s WHERE id = %s",
-                (author_name, author['id'])
-            )
-            return author['id']
-        cur.execute(
-            (
-                "INSERT INTO authors (user_id, author_slug, author) "
-                "VALUES (%s, %s, %s) RETURNING id"
-            ),
-            (user_db_id, author_slug, author_name)
-        )
-        return cur.fetchone()['id']
+    # Update the author name if it changed
+    cur.execute(
+        (
+            "UPDATE authors SET author = %s "
+            "WHERE user_id = %s AND author_slug = %s RETURNING id"
+        ),
+        (author_name, user_db_id, author_slug)
+    )
+    author = cur.fetchone()
+    if author:
+        return author['id']
+    cur.execute(
+        (
+            "INSERT INTO authors (user_id, author_slug, author) "
+            "VALUES (%s, %s, %s) RETURNING id"
+        ),
+        (user_db_id, author_slug, author_name)
+    )
+    return cur.fetchone()['id']
 
 
 def upload_to_db(poem_dict: dict) -> str:
@@ -154,9 +158,6 @@ def upload_to_db(poem_dict: dict) -> str:
     text = poem_dict.get("text", "").strip()
     request_id = poem_dict.get("request_id", "").strip()
 
-    user_db_id = ensure_user(user_id)
-    author_db_id = ensure_author(user_db_id, author)
-
     title_slug = slugify(title)
     author_slug = slugify(author)
     if user_id == main_user_id:
@@ -166,7 +167,10 @@ def upload_to_db(poem_dict: dict) -> str:
 
     upload_at = datetime.now().replace(microsecond=0)
 
+    # User, author and poem are written in a single transaction
     with get_db_cursor() as cur:
+        user_db_id = ensure_user(cur, user_id)
+        author_db_id = ensure_author(cur, user_db_id, author)
         cur.execute(
             (
                 "INSERT INTO poems (author_id, title_slug, title, poem, "
@@ -340,11 +344,7 @@ def delete_user_db(user_id: str) -> None:
         None
     """
     with get_db_cursor() as cur:
-        cur.execute("SELECT id FROM users WHERE user_id = %s", (user_id,))
-        user = cur.fetchone()
-        if not user:
-            return
-        cur.execute("DELETE FROM users WHERE id = %s", (user['id'],))
+        cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
 
 
 def delete_author_db(user_id: str, author: str) -> None:
@@ -358,23 +358,13 @@ def delete_author_db(user_id: str, author: str) -> None:
     Returns:
         None
     """
+    author_slug = slugify(author)
     with get_db_cursor() as cur:
-        cur.execute("SELECT id FROM users WHERE user_id = %s", (user_id,))
-        user = cur.fetchone()
-        if not user:
-            return
-        user_db_id = user['id']
-
-        author_slug = slugify(author)
-        cur.execute(
-            "SELECT id FROM authors WHERE user_id = %s AND author_slug = %s",
-            (user_db_id, author_slug)
-        )
-        author_row = cur.fetchone()
-        if not author_row:
-            return
-
-        cur.execute("DELETE FROM authors WHERE id = %s", (author_row['id'],))
+        cur.execute("""
+            DELETE FROM authors
+            WHERE user_id = (SELECT id FROM users WHERE user_id = %s)
+              AND author_slug = %s
+        """, (user_id, author_slug))
 
 
 def delete_poem_db(user_id: str, author: str, title: str) -> None:
@@ -389,25 +379,16 @@ def delete_poem_db(user_id: str, author: str, title: str) -> None:
     Returns:
         None
     """
+    author_slug = slugify(author)
+    title_slug = slugify(title)
     with get_db_cursor() as cur:
-        cur.execute("SELECT id FROM users WHERE user_id = %s", (user_id,))
-        user = cur.fetchone()
-        if not user:
-            return
-        user_db_id = user['id']
-
-        author_slug = slugify(author)
-        title_slug = slugify(title)
-
-        cur.execute(
-            "SELECT id FROM authors WHERE user_id = %s AND author_slug = %s",
-            (user_db_id, author_slug)
-        )
-        author_row = cur.fetchone()
-        if not author_row:
-            return
-
-        cur.execute(
-            "DELETE FROM poems WHERE author_id = %s AND title_slug = %s",
-            (author_row['id'], title_slug)
-        )
+        cur.execute("""
+            DELETE FROM poems
+            WHERE author_id IN (
+                SELECT a.id
+                FROM authors a
+                JOIN users u ON a.user_id = u.id
+                WHERE u.user_id = %s AND a.author_slug = %s
+            )
+              AND title_slug = %s
+        """, (user_id, author_slug, title_slug))
@@ -2,19 +2,45 @@
 Logging Configuration Utility
 
 Provides a helper function to create a standardized logger with
-console output and consistent formatting across the project.
+console output and consistent formatting across the project. Records are
+handed to a background thread so request handlers never block on writes.
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+DEFAULT_FORMAT = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
+DEFAULT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+# Shared by every logger using the default format
+DEFAULT_FORMATTER = logging.Formatter(fmt=DEFAULT_FORMAT,
+                                      datefmt=DEFAULT_DATEFMT)
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """
+    Stream handler that only flushes once its log queue is drained, so a
+    burst of records reaches the stream in a single write.
+    """
+
+    def __init__(self, stream, log_queue: queue.Queue):
+        super().__init__(stream)
+        self.log_queue = log_queue
+
+    def flush(self):
+        """Flush the stream unless more records are waiting."""
+        if self.log_queue.empty():
+            super().flush()
+
 
 def configure_logger(
     name: str,
     level: int = logging.INFO,
-    fmt: str = "%(asctime)s | %(name)s | %(levelname)s | %(message)s",
-    datefmt: Optional[str] = "%Y-%m-%d %H:%M:%S",
+    fmt: str = DEFAULT_FORMAT,
+    datefmt: Optional[str] = DEFAULT_DATEFMT,
     stream=sys.stdout
 ) -> logging.Logger:
     """
@@ -31,15 +57,29 @@ def configure_logger(
         logging.Logger: Configured logger instance.
     """
     logger = logging.getLogger(name)
-    logger.setLevel(level)
 
-    # Avoid adding multiple handlers if logger is reconfigured
-    if not logger.handlers:
-        handler = logging.StreamHandler(stream)
-        handler.setLevel(level)
+    # Already configured: leave it untouched to keep its level cache
+    if logger.handlers:
+        return logger
+
+    if logger.level != level:
+        logger.setLevel(level)
+
+    # Write records from a listener thread; the logger only enqueues
+    log_queue = queue.Queue(-1)
+    handler = BatchingStreamHandler(stream, log_queue)
+    handler.setLevel(level)
+    if fmt == DEFAULT_FORMAT and datefmt == DEFAULT_DATEFMT:
+        formatter = DEFAULT_FORMATTER
+    else:
         formatter = logging.Formatter(fmt=fmt, datefmt=datefmt)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    handler.setFormatter(formatter)
+    listener = QueueListener(log_queue, handler,
+                             respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(QueueHandler(log_queue))
 
-    logger.propagate = False
+    if logger.propagate:
+        logger.propagate = False
     return logger
@@ -2,9 +2,51 @@
 Utility Functions Module
 """
 
+import io
 import re
 from typing import List
 
+# Markdown patterns, compiled once at import
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)')
+# Leading-space HTML for the most common indent widths
+NBSP_CACHE = tuple('&nbsp;' * i for i in range(33))
+# Opening and closing tags by heading level
+HEADING_TAGS = tuple((f'<h{i}>', f'</h{i}>') for i in range(7))
+# Bold italic (***, ___), bold (**, __) and italic (*, _) spans in a
+# single alternation. Spans are non-empty, never cross a block and never
+# contain their own delimiter, except that bold may hold a nested italic
+# and italic a nested bold, so a stray marker fails fast instead of
+# backtracking over the rest of the document. An italic '*' is never
+# half of a '**', so an unpaired '*' is left as text rather than closing
+# on a later bold. Underscores only count at word boundaries, leaving
+# names like snake_case untouched.
+INLINE_RE = re.compile(
+    r'\*\*\*(?P<bold_italic_star>[^*\n]+)\*\*\*'
+    r'|(?<!\w)___(?P<bold_italic_underscore>[^_\n]+)___(?!\w)'
+    r'|\*\*(?P<bold_star>(?:[^*\n]|\*[^*\n]+\*)+)\*\*'
+    r'|(?<!\w)__(?P<bold_underscore>(?:[^_\n]|_[^_\n]+_)+)__(?!\w)'
+    r'|(?<!\*)\*(?P<italic_star>(?:[^*\n]|\*\*[^*\n]+\*\*)+)\*(?!\*)'
+    r'|(?<!\w)_(?P<italic_underscore>(?:[^_\n]|__[^_\n]+__)+)_(?!\w)'
+)
+INLINE_TAGS = {
+    'bold_italic_star': ('<strong><em>', '</em></strong>'),
+    'bold_italic_underscore': ('<strong><em>', '</em></strong>'),
+    'bold_star': ('<strong>', '</strong>'),
+    'bold_underscore': ('<strong>', '</strong>'),
+    'italic_star': ('<em>', '</em>'),
+    'italic_underscore': ('<em>', '</em>'),
+}
+
+
+def format_inline(match: re.Match) -> str:
+    """
+    Replace a bold or italic span with its HTML tags, formatting any
+    spans nested inside it.
+    """
+    open_tag, close_tag = INLINE_TAGS[match.lastgroup]
+    inner = INLINE_RE.sub(format_inline, match.group(match.lastgroup))
+    return open_tag + inner + close_tag
+
 
 def markdown_to_html(md_text: str) -> str:
     """
@@ -23,35 +65,62 @@ def markdown_to_html(md_text: str) -> str:
     Returns:
         str: HTML string.
     """
-    html_lines: List[str] = []
+    out = io.StringIO()
     buffer: List[str] = []  # Used to group paragraph lines
 
+    def write_block(block: str):
+        """Write an HTML block to the output, one block per line."""
+        if out.tell():
+            out.write('\n')
+        out.write(block)
+
     def flush_buffer():
-        """Append the current paragraph buffer to HTML output."""
+        """Write the current paragraph buffer to HTML output."""
         if buffer:
-            paragraph = '<br>'.join(buffer)
-            html_lines.append(f"<p>{paragraph}</p>")
+            write_block('<p>' + '<br>'.join(buffer) + '</p>')
             buffer.clear()
 
-    for line in md_text.split('\n'):
+    # Without heading or blockquote markers every line is paragraph text
+    has_blocks = '#' in md_text or '>' in md_text
+
+    # Walk the lines by newline offset rather than building a list of them
+    start = 0
+    while start >= 0:
+        end = md_text.find('\n', start)
+        if end < 0:
+            line, start = md_text[start:], -1
+        else:
+            line, start = md_text[start:end], end + 1
+
         stripped = line.lstrip()
         leading_spaces = len(line) - len(stripped)
-        spaces_html = '&nbsp;' * leading_spaces
-        content = spaces_html + stripped
+        if not leading_spaces:
+            spaces_html = ''
+            content = line
+        else:
+            if leading_spaces < len(NBSP_CACHE):
+                spaces_html = NBSP_CACHE[leading_spaces]
+            else:
+                spaces_html = '&nbsp;' * leading_spaces
+            content = spaces_html + stripped
+
+        if not has_blocks:
+            buffer.append(content)
+            continue
 
         # Headings (#, ##, ...)
-        if re.match(r'^(#{1,6})\s+(.*)', stripped):
+        match = HEADING_RE.match(stripped)
+        if match:
             flush_buffer()
-            match = re.match(r'^(#{1,6})\s+(.*)', stripped)
-            level = len(match.group(1))
-            content = spaces_html + match.group(2)
-            html_lines.append(f"<h{level}>{content}</h{level}>")
+            open_tag, close_tag = HEADING_TAGS[len(match.group(1))]
+            write_block(
+                open_tag + spaces_html + match.group(2) + close_tag)
 
         # Blockquote
         elif stripped.startswith('>'):
             flush_buffer()
-            quote_content = stripped[1:].strip()
-            html_lines.append(f"<blockquote>{quote_content}</blockquote>")
+            write_block(
+                '<blockquote>' + stripped[1:].strip() + '</blockquote>')
 
         # Normal text → add to paragraph buffer
         else:
@@ -60,10 +129,8 @@ def markdown_to_html(md_text: str) -> str:
     flush_buffer()
 
     # Apply bold and italic formatting
-    html = '\n'.join(html_lines)
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'__(.*?)__', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html)
-    html = re.sub(r'_(.*?)_', r'<em>\1</em>', html)
+    html = out.getvalue()
+    if '*' in html or '_' in html:
+        html = INLINE_RE.sub(format_inline, html)
 
     return html
@@ -6,17 +6,19 @@ and manage poem data through various commands.
 """
 
 import os
+import asyncio
 import uuid
-import shutil
-import imghdr
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from typing import Optional
 import threading
 import json
+import weakref
 
 from flask import Flask
 from flask_cors import CORS
 from apscheduler.schedulers.background import BackgroundScheduler
+from cachetools import TTLCache
 import requests
 import aiohttp
 from dotenv import load_dotenv
@@ -29,8 +31,15 @@ from telegram.ext import (
     filters,
 )
 
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
+
 from process import process_poem
 from utils.logging_config import configure_logger
+from utils.llm_utils import build_image_block
+from utils.utils import encode_image_bytes
 
 
 # Load environment variables from .env file
@@ -41,20 +50,23 @@ with open(MSG_PATH, "r", encoding="utf-8") as f:
     MESSAGES = json.load(f)
 
 # Configuration from environment variables
-TEMP_DIR: str = os.getenv("TEMP_DIR")
 MAX_IMAGES: int = int(os.getenv("MAX_IMAGES"))
 ALLOWED_USER_ID: str = os.getenv("ALLOWED_USER_ID")
 API_DOMAIN: str = os.getenv("API_DOMAIN")
 BOT_NAME: str = os.getenv("BOT_NAME")
 BOT_DOMAIN: str = os.getenv("BOT_DOMAIN")
 
+MAX_IMAGE_SIZE = 20 * 1024 * 1024  # Bot API download limit
+API_HEADERS = {"Content-Type": "application/json"}
+SESSION_TTL = 60 * 60  # Seconds before an idle session is discarded
+MAX_SESSIONS = 10_000
 
 if (
-    not API_DOMAIN or not ALLOWED_USER_ID or not TEMP_DIR
+    not API_DOMAIN or not ALLOWED_USER_ID
     or not MAX_IMAGES or not BOT_NAME or not BOT_DOMAIN
 ):
     raise RuntimeError(
-        "API_DOMAIN, ALLOWED_USER_ID, TEMP_DIR, MAX_IMAGES, BOT_NAME "
+        "API_DOMAIN, ALLOWED_USER_ID, MAX_IMAGES, BOT_NAME "
         "or BOT_DOMAIN environment variables are not set."
     )
 
@@ -62,9 +74,64 @@ if (
 logger = configure_logger(BOT_NAME)
 
 
+# Bot command menu, built once at import
+BOT_COMMANDS = [
+    BotCommand("start", "Start a new session"),
+    BotCommand("process", "Process uploaded images"),
+    BotCommand("edittitle", "Edit the poem's title"),
+    BotCommand("editpoem", "Edit the poem's content"),
+    BotCommand("editauthor", "Edit the author's name"),
+    BotCommand("upload", "Upload poem to the database"),
+    BotCommand("deleteall", "Delete all poems uploaded"),
+    BotCommand("deleteauthor", "Delete all author poems uploaded"),
+    BotCommand("deletepoem", "Delete a poem uploaded"),
+    BotCommand("getinfo", "Show poem info"),
+    BotCommand("reset", "Reset current session"),
+    BotCommand("help", "Show help message")
+]
+
+
 # --- In-memory session states ---
-user_sessions = {}  # Maps user_id -> request_id
-user_data = {}  # Maps user_id -> dict with author, title, text
+
+class SessionCache(TTLCache):
+    """
+    TTLCache of user_id -> request_id that also discards the user data
+    of sessions evicted by age or size. Reading a session restarts its
+    TTL, so only sessions idle for SESSION_TTL expire.
+    """
+
+    def get(self, user_id: int, default=None):
+        # Purge expired sessions first so their user data is never served
+        self.expire()
+        request_id = super().get(user_id)
+        if request_id is None:
+            return default
+        self[user_id] = request_id  # Restart the TTL
+        return request_id
+
+    def popitem(self):
+        user_id, request_id = super().popitem()
+        self._discard(user_id, request_id)
+        return user_id, request_id
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for user_id, request_id in expired:
+            self._discard(user_id, request_id)
+        return expired
+
+    @staticmethod
+    def _discard(user_id: int, request_id: str):
+        user_data.pop(user_id, None)
+        logger.info("%s | %s | Session evicted", user_id, request_id)
+
+
+# Maps user_id -> request_id
+user_sessions = SessionCache(maxsize=MAX_SESSIONS, ttl=SESSION_TTL)
+user_data = {}  # Maps user_id -> dict with author, title, text, images
+# Serializes session changes per user; a lock is dropped once unused
+user_locks = weakref.WeakValueDictionary()
+user_tasks = {}  # Maps user_id -> in-flight poem extraction task
 
 
 # --- Decorators ---
@@ -103,24 +170,42 @@ def get_message(key: str, lang: str = "en", **kwargs) -> str:
     return msg.format(**kwargs)
 
 
-def cleanup_temp_dir():
+def get_user_lock(user_id: int) -> asyncio.Lock:
     """
-    Clean up the temporary directory by deleting all contents.
+    Return the lock serializing session changes for the user, creating it
+    if nobody holds or waits on one.
+
+    Args:
+        user_id (int): Telegram user ID.
 
-    Creates the TEMP_DIR if it does not exist.
+    Returns:
+        asyncio.Lock: The user's lock.
     """
-    if not os.path.exists(TEMP_DIR):
-        os.makedirs(TEMP_DIR)
-    for name in os.listdir(TEMP_DIR):
-        path = os.path.join(TEMP_DIR, name)
-        if os.path.isdir(path):
-            shutil.rmtree(path, ignore_errors=True)
+    lock = user_locks.get(user_id)
+    if lock is None:
+        lock = user_locks[user_id] = asyncio.Lock()
+    return lock
 
 
-def create_session(user_id: int) -> str:
+async def create_session(user_id: int) -> str:
     """
     Create a new session for the user by generating a unique request ID
-    and setting up the required directory and in-memory session data.
+    and setting up the in-memory session data.
+
+    Args:
+        user_id (int): Telegram user ID.
+
+    Returns:
+        str: The newly created request ID.
+    """
+    async with get_user_lock(user_id):
+        return start_session(user_id)
+
+
+def start_session(user_id: int) -> str:
+    """
+    Replace the user's session with a new one without taking the user lock.
+    Callers must already hold the user lock.
 
     Args:
         user_id (int): Telegram user ID.
@@ -129,43 +214,34 @@ def create_session(user_id: int) -> str:
         str: The newly created request ID.
     """
     request_id = uuid.uuid4().hex[:16]
-    request_dir = os.path.join(TEMP_DIR, request_id)
 
     # Delete any existing session for this user
-    delete_user_session(user_id)
-
-    # Create the directory for this session
-    os.makedirs(request_dir, exist_ok=True)
+    discard_session(user_id)
 
     # Initialize session mappings
     user_sessions[user_id] = request_id
-    user_data[user_id] = {"author": "Unknown", "title": None, "text": None}
+    user_data[user_id] = {"author": "Unknown", "title": None, "text": None,
+                          "images": []}
 
     logger.info("%s | %s | Session created", user_id, request_id)
     return request_id
 
 
-def get_user_input_dir(user_id: int) -> Optional[str]:
+async def delete_user_session(user_id: int):
     """
-    Get the directory path for the current user's session input files.
+    Delete the user's current session and its in-memory data.
 
     Args:
         user_id (int): Telegram user ID.
-
-    Returns:
-        Optional[str]: Path to the user's session directory,
-        or None if no session exists.
     """
-    request_id = user_sessions.get(user_id)
-    if not request_id:
-        return None
-    return os.path.join(TEMP_DIR, request_id)
+    async with get_user_lock(user_id):
+        discard_session(user_id)
 
 
-def delete_user_session(user_id: int):
+def discard_session(user_id: int):
     """
-    Delete the user's current session, including all associated files
-    and in-memory data.
+    Remove the user's session data without taking the user lock.
+    Callers must already hold the user lock.
 
     Args:
         user_id (int): Telegram user ID.
@@ -173,10 +249,64 @@ def delete_user_session(user_id: int):
     request_id = user_sessions.pop(user_id, None)
     user_data.pop(user_id, None)
     if request_id:
-        shutil.rmtree(os.path.join(TEMP_DIR, request_id), ignore_errors=True)
         logger.info("%s | %s | Session deleted", user_id, request_id)
 
 
+def cancel_user_task(user_id: int):
+    """
+    Cancel the user's in-flight poem extraction, if any, so an abandoned
+    /process stops using the LLM and never replies.
+
+    Args:
+        user_id (int): Telegram user ID.
+    """
+    task = user_tasks.pop(user_id, None)
+    if task and not task.done():
+        task.cancel()
+        logger.info("%s | Poem processing cancelled", user_id)
+
+
+async def post_to_api(update: Update, endpoint: str, payload: dict,
+                      request_id: str, msg_prefix: str,
+                      expected_status: int = 200) -> Optional[dict]:
+    """
+    Send a JSON payload to a poems API endpoint.
+
+    On failure the error is logged and the user receives the
+    '<msg_prefix>_error' message.
+
+    Args:
+        update (Update): Telegram update that triggered the call.
+        endpoint (str): API path, e.g. '/api/delete_all'.
+        payload (dict): JSON body to send.
+        request_id (str): Current session request ID, used for logging.
+        msg_prefix (str): Message key prefix of the calling command.
+        expected_status (int, optional): Status code meaning success.
+
+    Returns:
+        Optional[dict]: Parsed JSON response on success, otherwise None.
+    """
+    user_id = update.effective_user.id
+    user_lang = update.effective_user.language_code
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{API_DOMAIN}{endpoint}",
+                                    json=payload,
+                                    headers=API_HEADERS) as resp:
+                if resp.status == expected_status:
+                    return await resp.json()
+                error_text = await resp.text()
+                logger.error("%s | %s | API call to %s failed. "
+                             "Status: %s - %s", user_id, request_id,
+                             endpoint, resp.status, error_text)
+    except aiohttp.ClientError as e:
+        logger.exception("%s | %s | Network error: %s", user_id, request_id, e)
+
+    await update.message.reply_text(
+        get_message(f"{msg_prefix}_error", lang=user_lang))
+    return None
+
+
 # --- Bot Command Handlers ---
 
 @restricted_command
@@ -189,9 +319,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | /start command invoked", user_id)
+    cancel_user_task(user_id)
 
     try:
-        request_id = create_session(user_id)
+        request_id = await create_session(user_id)
 
         author = " ".join(context.args)
         if not author:
@@ -222,62 +353,74 @@ async def process(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
-    request_id = user_sessions.get(user_id)
-    input_dir = get_user_input_dir(user_id)
     logger.info("%s | /process command invoked", user_id)
 
-    if not input_dir or not os.path.exists(input_dir):
-        logger.warning(
-            "%s | No active session or input directory found", user_id
-            )
-        await update.message.reply_text(
-            get_message("process_noimage", user_lang)
-            )
-        return
+    # Hold the user lock so /reset or /start cannot swap the session
+    # while its images are being processed
+    async with get_user_lock(user_id):
+        request_id = user_sessions.get(user_id)
+        data = user_data.get(user_id)
 
-    image_paths = sorted(
-        os.path.join(input_dir, f)
-        for f in os.listdir(input_dir)
-        if f.lower().endswith((".jpg", ".jpeg", ".png"))
-    )
+        if not request_id or not data or not data["images"]:
+            logger.warning(
+                "%s | No active session or uploaded images found", user_id
+                )
+            await update.message.reply_text(
+                get_message("process_noimage", user_lang)
+                )
+            return
 
-    if not image_paths:
-        logger.warning("%s | %s | No valid images found in %s",
-                       user_id, request_id, input_dir)
-        await update.message.reply_text(
-            get_message("process_imageerror", lang=user_lang))
-        return
+        # Track the extraction before the first await so /reset or /start
+        # can always find and cancel it
+        task = asyncio.create_task(process_poem(image_blocks=data["images"]))
+        user_tasks[user_id] = task
 
-    try:
-        result = process_poem(image_paths=image_paths)
-        user_data[user_id]["title"] = result.get("poem_title") or "Untitled"
-        user_data[user_id]["text"] = result.get("poem_text") or "Empty"
+        try:
+            await update.message.reply_text(
+                get_message("process_started", lang=user_lang))
 
-        await update.message.reply_text(
-            get_message("process_author",
-                        lang=user_lang, author=user_data[user_id]['author']),
-            parse_mode="Markdown")
+            # Shield so cancelling this handler doesn't look like /reset
+            # cancelling the extraction; the finally block cleans it up
+            result = await asyncio.shield(task)
+            data["title"] = result.get("poem_title") or "Untitled"
+            data["text"] = result.get("poem_text") or "Empty"
 
-        await update.message.reply_text(
-            get_message("process_title",
-                        lang=user_lang, title=user_data[user_id]['title']),
-            parse_mode="Markdown")
+            await update.message.reply_text(
+                get_message("process_author",
+                            lang=user_lang, author=data['author']),
+                parse_mode="Markdown")
 
-        await update.message.reply_text(
-            get_message("process_poem",
-                        lang=user_lang, poem=user_data[user_id]['text']),
-            parse_mode="Markdown")
+            await update.message.reply_text(
+                get_message("process_title",
+                            lang=user_lang, title=data['title']),
+                parse_mode="Markdown")
 
-        await update.message.reply_text(
-            get_message("process_continue", lang=user_lang))
+            await update.message.reply_text(
+                get_message("process_poem",
+                            lang=user_lang, poem=data['text']),
+                parse_mode="Markdown")
 
-        logger.info("%s | %s | Poem processed successfully",
-                    user_id, request_id)
-    except Exception as e:
-        logger.error("%s | %s | Error processing poem: %s",
-                     user_id, request_id, e, exc_info=True)
-        await update.message.reply_text(
-            get_message("process_error", lang=user_lang))
+            await update.message.reply_text(
+                get_message("process_continue", lang=user_lang))
+
+            logger.info("%s | %s | Poem processed successfully",
+                        user_id, request_id)
+        except asyncio.CancelledError:
+            # Only the extraction was cancelled; propagate if the handler was
+            if not task.cancelled():
+                raise
+            logger.info("%s | %s | Poem processing aborted",
+                        user_id, request_id)
+        except Exception as e:
+            logger.error("%s | %s | Error processing poem: %s",
+                         user_id, request_id, e, exc_info=True)
+            await update.message.reply_text(
+                get_message("process_error", lang=user_lang))
+        finally:
+            if not task.done():
+                task.cancel()
+            if user_tasks.get(user_id) is task:
+                del user_tasks[user_id]
 
 
 @restricted_command
@@ -341,7 +484,7 @@ async def edittitle(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         request_id = user_sessions.get(user_id)
         if not request_id:
-            request_id = create_session(user_id)
+            request_id = await create_session(user_id)
 
         title = " ".join(context.args)
         if not title:
@@ -375,7 +518,7 @@ async def editpoem(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         request_id = user_sessions.get(user_id)
         if not request_id:
-            request_id = create_session(user_id)
+            request_id = await create_session(user_id)
 
         # Extract text after command
         text = update.message.text.partition(" ")[2].strip()
@@ -410,7 +553,7 @@ async def editauthor(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         request_id = user_sessions.get(user_id)
         if not request_id:
-            request_id = create_session(user_id)
+            request_id = await create_session(user_id)
 
         author = " ".join(context.args).strip()
         if not author:
@@ -441,37 +584,17 @@ async def deleteall(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | /deleteall", user_id)
-    request_id = user_sessions.get(user_id)
-    if not request_id:
-        request_id = create_session(user_id)
+    request_id = user_sessions.get(user_id) or await create_session(user_id)
 
     poem_payload = {"user_id": str(user_id)}
-    headers = {"Content-Type": "application/json"}
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{API_DOMAIN}/api/delete_all",
-                                    json=poem_payload,
-                                    headers=headers) as resp:
-                if resp.status == 200:
-                    await update.message.reply_text(
-                        get_message("deleteall_ok", lang=user_lang)
-                    )
-                    logger.info("%s | %s | All poems deleted",
-                                user_id, request_id)
-                    delete_user_session(user_id)
-                else:
-                    error_text = await resp.text()
-                    logger.error("%s | %s | Failed to delete all poems via "
-                                 "API. Status: %s - %s",
-                                 user_id, request_id, resp.status, error_text)
-                    await update.message.reply_text(
-                        get_message("deleteall_error", lang=user_lang)
-                    )
-    except aiohttp.ClientError as e:
-        logger.exception("%s | %s | Network error: %s", user_id, request_id, e)
-        await update.message.reply_text(
-                        get_message("deleteall_error", lang=user_lang)
-                    )
+    if await post_to_api(update, "/api/delete_all", poem_payload,
+                         request_id, "deleteall") is None:
+        return
+
+    await update.message.reply_text(
+        get_message("deleteall_ok", lang=user_lang))
+    logger.info("%s | %s | All poems deleted", user_id, request_id)
+    await delete_user_session(user_id)
 
 
 @restricted_command
@@ -484,9 +607,7 @@ async def deleteauthor(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | /deleteauthor", user_id)
-    request_id = user_sessions.get(user_id)
-    if not request_id:
-        request_id = create_session(user_id)
+    request_id = user_sessions.get(user_id) or await create_session(user_id)
 
     author = " ".join(context.args).strip()
     if not author:
@@ -499,34 +620,14 @@ async def deleteauthor(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "user_id": str(user_id),
         "author": author
     }
+    if await post_to_api(update, "/api/delete_author", poem_payload,
+                         request_id, "deleteauthor") is None:
+        return
 
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{API_DOMAIN}/api/delete_author",
-                                    json=poem_payload,
-                                    headers=headers) as resp:
-                if resp.status == 200:
-                    await update.message.reply_text(
-                        get_message("deleteauthor_ok", lang=user_lang)
-                    )
-                    logger.info("%s | %s | Author poems deleted",
-                                user_id, request_id)
-                    delete_user_session(user_id)
-                else:
-                    error_text = await resp.text()
-                    logger.error("Failed to delete author poems via API. "
-                                 "Status: %s - %s",
-                                 resp.status, error_text)
-                    await update.message.reply_text(
-                        get_message("deleteauthor_error", lang=user_lang)
-                    )
-    except aiohttp.ClientError as e:
-        logger.exception("%s | %s | Network error: %s", user_id, request_id, e)
-        await update.message.reply_text(
-                        get_message("deleteauthor_error", lang=user_lang)
-                    )
+    await update.message.reply_text(
+        get_message("deleteauthor_ok", lang=user_lang))
+    logger.info("%s | %s | Author poems deleted", user_id, request_id)
+    await delete_user_session(user_id)
 
 
 @restricted_command
@@ -540,7 +641,7 @@ async def deletepoem(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_lang = update.effective_user.language_code
     logger.info("%s | /deletepoem", user_id)
 
-    request_id = user_sessions.get(user_id) or create_session(user_id)
+    request_id = user_sessions.get(user_id) or await create_session(user_id)
 
     raw_text = " ".join(context.args).strip()
     if not raw_text:
@@ -565,32 +666,14 @@ async def deletepoem(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "author": author,
         "title": title
     }
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{API_DOMAIN}/api/delete_poem",
-                                    json=poem_payload,
-                                    headers=headers) as resp:
-                if resp.status == 200:
-                    await update.message.reply_text(
-                        get_message("deletepoem_ok", lang=user_lang))
-                    logger.info("%s | %s | Poem deleted", user_id, request_id)
-                    delete_user_session(user_id)
-                else:
-                    error_text = await resp.text()
-                    logger.error(
-                        "%s | %s | Failed to delete poem via API. "
-                        "Status: %s - %s",
-                        user_id, request_id, resp.status, error_text
-                    )
-                    await update.message.reply_text(
-                        get_message("deletepoem_error", lang=user_lang))
+    if await post_to_api(update, "/api/delete_poem", poem_payload,
+                         request_id, "deletepoem") is None:
+        return
 
-    except aiohttp.ClientError as e:
-        logger.exception("%s | %s | Network error: %s", user_id, request_id, e)
-        await update.message.reply_text(
-                        get_message("deletepoem_error", lang=user_lang))
+    await update.message.reply_text(
+        get_message("deletepoem_ok", lang=user_lang))
+    logger.info("%s | %s | Poem deleted", user_id, request_id)
+    await delete_user_session(user_id)
 
 
 @restricted_command
@@ -603,8 +686,8 @@ async def upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | /upload", user_id)
-    data = user_data.get(user_id)
     request_id = user_sessions.get(user_id)
+    data = user_data.get(user_id)
 
     if (
         not data or not request_id or not all([data.get("author"),
@@ -624,33 +707,16 @@ async def upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "title": data["title"],
         "text": data["text"]
     }
+    result = await post_to_api(update, "/api/upload_poem", poem_payload,
+                               request_id, "upload", expected_status=201)
+    if result is None:
+        return
 
-    headers = {"Content-Type": "application/json"}
-
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{API_DOMAIN}/api/upload_poem",
-                                    json=poem_payload,
-                                    headers=headers) as resp:
-                if resp.status == 201:
-                    data = await resp.json()
-                    poem_url = data["poem_url"]
-                    poem_url = f"{API_DOMAIN}/{poem_url}"
-                    await update.message.reply_text(
-                        get_message("upload_ok",
-                                    lang=user_lang, poem_url=poem_url))
-                    delete_user_session(user_id)
-                else:
-                    error_text = await resp.text()
-                    logger.error("%s | %s | Failed to upload poem via API. "
-                                 "Status: %s - %s",
-                                 user_id, request_id, resp.status, error_text)
-                    await update.message.reply_text(
-                        get_message("upload_error", lang=user_lang))
-    except aiohttp.ClientError as e:
-        logger.exception("%s | %s | Network error: %s", user_id, request_id, e)
-        await update.message.reply_text(
-                        get_message("upload_error", lang=user_lang))
+    poem_url = f"{API_DOMAIN}/{result['poem_url']}"
+    await update.message.reply_text(
+        get_message("upload_ok", lang=user_lang, poem_url=poem_url))
+    logger.info("%s | %s | Poem uploaded", user_id, request_id)
+    await delete_user_session(user_id)
 
 
 @restricted_command
@@ -661,7 +727,8 @@ async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | /reset", user_id)
-    delete_user_session(user_id)
+    cancel_user_task(user_id)
+    await delete_user_session(user_id)
     await update.message.reply_text(get_message("reset", lang=user_lang))
 
 
@@ -692,68 +759,59 @@ async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_image(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handles incoming image uploads.
-    Uploades images in user session folder, preserving the order.
+    Keeps the images in the user session, preserving the order.
     Enforces max number of images.
     """
     user_id = update.effective_user.id
     user_lang = update.effective_user.language_code
     logger.info("%s | Image handled.", user_id)
-    request_id = user_sessions.get(user_id)
-    input_dir = get_user_input_dir(user_id)
-
-    # Create session if it doesn't exist
-    if not input_dir:
-        request_id = create_session(user_id)
-        input_dir = get_user_input_dir(user_id)
-
-    # List existing image files with valid extensions
-    image_paths = [
-        f for f in os.listdir(input_dir)
-        if f.lower().endswith((".jpg", ".jpeg", ".png"))
-    ]
-
-    # If user already exceeded max images, discard new image and notify
-    if len(image_paths) >= MAX_IMAGES:
-        logger.warning("%s | %s | The image was not uploaded because "
-                       "the maximum number of images was reached",
-                       user_id, request_id)
-        await update.message.reply_text(
-            get_message("image_max", lang=user_lang, max_images=MAX_IMAGES))
-        return
-
-    image_index = len(image_paths) + 1
-
-    photo_file = await update.message.photo[-1].get_file()
-
-    # Download image temporarily
-    temp_path = os.path.join(input_dir, f"{image_index:03d}.tmp")
-    await photo_file.download_to_drive(temp_path)
 
-    # Detect actual image extension
-    detected_type = imghdr.what(temp_path)
-    if detected_type not in ['jpeg', 'png']:
-        logger.warning("%s | %s | Unsupported image type: %s",
-                       user_id, request_id, detected_type)
-        os.remove(temp_path)
-        await update.message.reply_text(
-            get_message("image_invalid", lang=user_lang))
-        return
+    # Photos of an album arrive as concurrent updates; handle them one at
+    # a time per user so they keep their upload order
+    async with get_user_lock(user_id):
+        # Create session if it doesn't exist
+        request_id = user_sessions.get(user_id) or start_session(user_id)
+        images = user_data[user_id]["images"]
+
+        # If user already exceeded max images, discard new image and notify
+        if len(images) >= MAX_IMAGES:
+            logger.warning("%s | %s | The image was not uploaded because "
+                           "the maximum number of images was reached",
+                           user_id, request_id)
+            await update.message.reply_text(
+                get_message("image_max", lang=user_lang,
+                            max_images=MAX_IMAGES))
+            return
 
-    # Map detected type to correct extension
-    extension = 'jpg' if detected_type == 'jpeg' else 'png'
-    final_path = os.path.join(input_dir, f"{image_index:03d}.{extension}")
+        # Telegram photos are always re-encoded as JPEG, so only the size
+        # needs checking and it is known before downloading
+        photo = update.message.photo[-1]
+        if (photo.file_size or 0) > MAX_IMAGE_SIZE:
+            logger.warning("%s | %s | Image too large: %s bytes",
+                           user_id, request_id, photo.file_size)
+            await update.message.reply_text(
+                get_message("image_too_large", lang=user_lang))
+            return
 
-    os.rename(temp_path, final_path)
+        # Keep the image in memory as a ready-to-send LLM content block,
+        # so repeated /process calls do not rebuild its data URL
+        photo_file = await photo.get_file()
+        image_bytes = await photo_file.download_as_bytearray()
+        encoded = await asyncio.to_thread(encode_image_bytes,
+                                          bytes(image_bytes))
+        images.append(build_image_block(encoded))
+        image_index = len(images)
 
     # Notify user if this image hits the max count exactly
     if image_index == MAX_IMAGES:
         await update.message.reply_text(
-            get_message("image_limit", lang=user_lang))
+            get_message("image_limit", lang=user_lang,
+                        max_images=MAX_IMAGES))
         return
 
     await update.message.reply_text(get_message("image_ok", lang=user_lang))
-    logger.info("%s | %s | Image uploaded at %s",
-                user_id, request_id, final_path)
+    logger.info("%s | %s | Image %s uploaded",
+                user_id, request_id, image_index)
 
 
 # --- Register Bot Commands (Menu) ---
@@ -762,21 +820,17 @@ async def set_bot_commands(application):
     """
     Handles set bot commands.
     """
-    commands = [
-        BotCommand("start", "Start a new session"),
-        BotCommand("process", "Process uploaded images"),
-        BotCommand("edittitle", "Edit the poem's title"),
-        BotCommand("editpoem", "Edit the poem's content"),
-        BotCommand("editauthor", "Edit the author's name"),
-        BotCommand("upload", "Upload poem to the database"),
-        BotCommand("deleteall", "Delete all poems uploaded"),
-        BotCommand("deleteauthor", "Delete all author poems uploaded"),
-        BotCommand("deletepoem", "Delete a poem uploaded"),
-        BotCommand("getinfo", "Show poem info"),
-        BotCommand("reset", "Reset current session"),
-        BotCommand("help", "Show help message")
-    ]
-    await application.bot.set_my_commands(commands)
+    await application.bot.set_my_commands(BOT_COMMANDS)
+
+
+async def post_init(application):
+    """
+    Size the default thread pool used for blocking work and register
+    the bot commands once the application has started.
+    """
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=MAX_IMAGES * 2))
+    await set_bot_commands(application)
 
 
 # --- Flask App Initialization ---
@@ -834,8 +888,9 @@ if __name__ == "__main__":
     threading.Thread(target=run_webserver, daemon=True).start()
     threading.Thread(target=keep_alive, daemon=True).start()
 
-    # Clean data dir
-    cleanup_temp_dir()
+    # Run the bot on the faster libuv event loop when available
+    if uvloop:
+        uvloop.install()
 
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     if not token:
@@ -843,8 +898,17 @@ if __name__ == "__main__":
             "TELEGRAM_BOT_TOKEN not set in environment variables."
             )
 
-    application = ApplicationBuilder().token(token).build()
-    application.post_init = set_bot_commands
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(256)
+        .connection_pool_size(64)
+        .pool_timeout(20.0)
+        .read_timeout(30.0)
+        .write_timeout(60.0)
+        .build()
+    )
+    application.post_init = post_init
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("process", process))
@@ -6,34 +6,49 @@ and retrieve metadata such as the poem's title and text content
 using a combination of OCR and large language model (LLM) based tools.
 """
 
+import asyncio
+
 from dotenv import load_dotenv
-from utils.llm_utils import call_extractor
+from utils.llm_utils import build_image_blocks, call_extractor
 from utils.utils import encode_image_to_base64
 
 
 load_dotenv()
 
 
-def process_poem(image_paths: list[str]) -> dict[str, str]:
+async def encode_images(image_paths: list[str]) -> list[str]:
     """
-    Process a list of poem images to extract the poem's title and text content.
+    Encode poem image files as base64 strings, reading them in parallel
+    threads.
 
     Args:
         image_paths (list[str]): List of file paths to poem images.
 
+    Returns:
+        list[str]: Base64-encoded images, in the same order.
+    """
+    return await asyncio.gather(*(
+        asyncio.to_thread(encode_image_to_base64, path.strip())
+        for path in image_paths
+    ))
+
+
+async def process_poem(image_blocks: list[dict]) -> dict[str, str]:
+    """
+    Process a list of poem images to extract the poem's title and text content.
+
+    Args:
+        image_blocks (list[dict]): Poem images as LLM content blocks,
+                                   built with build_image_block(s).
+
     Returns:
         dict[str, str]: Dictionary containing 'poem_title' and 'poem_text'.
     """
-    if not image_paths:
+    if not image_blocks:
         return {"poem_title": "", "poem_text": ""}
 
-    # Encode all images as base64 strings
-    encoded_images = [
-        encode_image_to_base64(path.strip()) for path in image_paths
-    ]
-
     # Extract title and markdown poem text from the encoded images
-    poem_title, poem_text = call_extractor(encoded_images)
+    poem_title, poem_text = await call_extractor(image_blocks)
 
     return {"poem_title": poem_title, "poem_text": poem_text}
 
@@ -41,5 +56,6 @@ def process_poem(image_paths: list[str]) -> dict[str, str]:
 if __name__ == "__main__":
 
     paths = ["poems/junin.jpeg"]
-    result = process_poem(paths)
+    images = asyncio.run(encode_images(paths))
+    result = asyncio.run(process_poem(build_image_blocks(images)))
     print(result)
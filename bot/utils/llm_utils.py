@@ -6,18 +6,38 @@ poem metadata from encoded images using large language models (LLMs).
 """
 
 import os
+import asyncio
 import json
 import re
+from functools import lru_cache
 from typing import Optional, Tuple, List
-from groq import Groq
+import orjson
+from groq import (AsyncGroq, RateLimitError, APIConnectionError,
+                  APITimeoutError, InternalServerError)
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Cap on concurrent Groq requests, shared by every user of the bot
+GROQ_SEMAPHORE = asyncio.Semaphore(
+    int(os.getenv("GROQ_MAX_CONCURRENCY", "8")))
+GROQ_MAX_RETRIES = 3
+# Transient Groq errors worth retrying after a backoff
+GROQ_RETRY_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError,
+                     InternalServerError)
 
+# AsyncGroq client shared by every LLM call, see get_groq_client
+groq_client: Optional[AsyncGroq] = None
+
+# Fenced ```json code block wrapping the model's answer
+JSON_FENCE_RE = re.compile(r"```json\s*([\s\S]*?)\s*```", re.IGNORECASE)
+
+
+@lru_cache(maxsize=16)
 def load_prompt(path: str) -> str:
     """
     Load the content of a prompt file from disk.
+    The result is cached, so each prompt is read only once.
 
     Args:
         path (str): File path to the prompt file.
@@ -44,8 +64,7 @@ def parse_json_from_response(content: str) -> str:
         str: Cleaned JSON string ready for parsing.
     """
     # Remove fenced code blocks with json syntax
-    cleaned = re.sub(r"```json\s*([\s\S]*?)\s*```", r"\1", content,
-                     flags=re.IGNORECASE).strip()
+    cleaned = JSON_FENCE_RE.sub(r"\1", content).strip()
 
     # Remove any remaining fenced code blocks (without language specifier)
     if cleaned.startswith("```") and cleaned.endswith("```"):
@@ -54,43 +73,131 @@ def parse_json_from_response(content: str) -> str:
     return cleaned
 
 
-def call_extractor(
-        encoded_images: List[str]) -> Optional[Tuple[str, str]]:
+def load_json(content: str):
     """
-    Call the Groq API to extract poem metadata (title and markdown text)
-    from base64-encoded images.
+    Parse a JSON string with orjson, falling back to the standard library
+    for documents orjson rejects (e.g. NaN values).
+
+    Args:
+        content (str): JSON string.
+
+    Returns:
+        The parsed JSON value.
+
+    Raises:
+        json.JSONDecodeError: If the content is not valid JSON.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return json.loads(content)
+
+
+def get_groq_client() -> AsyncGroq:
+    """
+    Return the shared AsyncGroq client, creating it on first use so that
+    its connection pool is reused across requests.
+
+    Returns:
+        AsyncGroq: The shared Groq client.
+    """
+    global groq_client
+    if groq_client is None:
+        api_key = os.environ.get("GROQ_API_KEY")
+        if not api_key:
+            raise RuntimeError("GROQ_API_KEY not set.")
+        # Retries are left to stream_completion, which backs off on
+        # transient errors outside GROQ_SEMAPHORE instead of sleeping while
+        # holding it
+        groq_client = AsyncGroq(api_key=api_key, max_retries=0,
+                                timeout=60.0)
+    return groq_client
+
+
+async def stream_completion(**kwargs) -> str:
+    """
+    Stream a chat completion from Groq and return its text, limiting the
+    number of requests in flight and backing off exponentially on rate
+    limits, connection errors, timeouts and server errors.
+
+    Args:
+        **kwargs: Arguments forwarded to chat.completions.create.
+
+    Returns:
+        str: The stripped completion text.
+    """
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        try:
+            async with GROQ_SEMAPHORE:
+                stream = await get_groq_client().chat.completions.create(
+                    stream=True, **kwargs)
+                parts = []
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                return "".join(parts).strip()
+        except GROQ_RETRY_ERRORS:
+            if attempt == GROQ_MAX_RETRIES:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+
+def build_image_block(encoded_image: str) -> dict:
+    """
+    Wrap a base64-encoded image in the message block expected by the
+    Groq API.
+
+    Args:
+        encoded_image (str): Base64-encoded JPEG image.
+
+    Returns:
+        dict: An image_url content block.
+    """
+    return {"type": "image_url",
+            "image_url": {"url": "data:image/jpeg;base64," + encoded_image}}
+
+
+def build_image_blocks(encoded_images: List[str]) -> List[dict]:
+    """
+    Wrap base64-encoded images in the message blocks expected by the
+    Groq API.
 
     Args:
         encoded_images (List[str]): List of base64-encoded images.
 
+    Returns:
+        List[dict]: One image_url content block per image.
+    """
+    return [build_image_block(img) for img in encoded_images]
+
+
+async def call_extractor(
+        image_blocks: List[dict]) -> Optional[Tuple[str, str]]:
+    """
+    Call the Groq API to extract poem metadata (title and markdown text)
+    from images.
+
+    Args:
+        image_blocks (List[dict]): Image content blocks built with
+                                   build_image_blocks.
+
     Returns:
         Optional[Tuple[str, str]]: A tuple of (title, markdown text) if
                                    extraction succeeds, otherwise (None, None).
     """
-    api_key = os.environ.get("GROQ_API_KEY")
     model_name = os.environ.get("MODEL_NAME")
 
-    if not api_key:
-        raise RuntimeError("GROQ_API_KEY not set.")
     if not model_name:
         raise RuntimeError("MODEL_NAME not set.")
 
     try:
-        # Prepare image blocks in the format expected by the Groq API
-        image_blocks = [
-            {"type": "image_url",
-             "image_url": {"url": f"data:image/jpeg;base64,{img}"}}
-            for img in encoded_images
-        ]
-
         # Load prompt text from disk
         prompt_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             "prompts/poem_extractor.txt")
         prompt = load_prompt(prompt_path)
 
-        client = Groq(api_key=api_key)
-        response = client.chat.completions.create(
+        content = await stream_completion(
             model=model_name,
             messages=[
                 {
@@ -102,15 +209,13 @@ def call_extractor(
             ],
             max_completion_tokens=2048,
             temperature=0,
-            stream=False,
         )
 
-        # Extract and clean the response content
-        content = response.choices[0].message.content.strip()
+        # Clean the response content
         clean_content = parse_json_from_response(content)
 
         # Parse JSON content
-        parsed = json.loads(clean_content)
+        parsed = load_json(clean_content)
 
         title = parsed.get("title", "").strip()
         markdown = parsed.get("markdown", "").strip()
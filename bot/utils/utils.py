@@ -2,7 +2,21 @@
 Utility Functions Module
 """
 
-import base64
+import os
+import io
+
+from PIL import Image
+
+try:
+    # SIMD-accelerated drop-in for base64.b64encode
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png"})
+# Longest image edge sent to the LLM; larger photos add no OCR detail
+MAX_IMAGE_EDGE = 1600
+JPEG_QUALITY = 85
 
 
 def encode_image_to_base64(image_path: str) -> str:
@@ -19,17 +33,51 @@ def encode_image_to_base64(image_path: str) -> str:
         ValueError: If the file extension is not supported.
         RuntimeError: If the file is missing or cannot be read.
     """
-    if not image_path.lower().endswith((".jpg", ".jpeg", ".png")):
+    if os.path.splitext(image_path)[1].lower() not in ALLOWED_EXTENSIONS:
         raise ValueError(
             "Only .jpg, .jpeg, or .png images are supported.")
 
     try:
         with open(image_path, "rb") as image_file:
-            image_bytes = image_file.read()
-            return base64.b64encode(image_bytes).decode("utf-8")
+            return b64encode(image_file.read()).decode("ascii")
     except FileNotFoundError as e:
         raise RuntimeError(
             f"Image file not found: {image_path}") from e
     except Exception as e:
         raise RuntimeError(
             f"Failed to encode image: {e}") from e
+
+
+def downscale_image(image_bytes: bytes) -> bytes:
+    """
+    Shrink an image so its longest edge is at most MAX_IMAGE_EDGE pixels,
+    re-encoding it as JPEG. Images within the limit are returned as is.
+
+    Args:
+        image_bytes (bytes): Raw image content.
+
+    Returns:
+        bytes: Image content ready to be sent to the LLM.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if max(image.size) <= MAX_IMAGE_EDGE:
+            return image_bytes
+        image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE),
+                        Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY,
+                                  optimize=True)
+        return buffer.getvalue()
+
+
+def encode_image_bytes(image_bytes: bytes) -> str:
+    """
+    Downscale an in-memory image and encode it to Base64 format.
+
+    Args:
+        image_bytes (bytes): Raw image content.
+
+    Returns:
+        str: Base64-encoded string of the downscaled image.
+    """
+    return b64encode(downscale_image(image_bytes)).decode("ascii")